@@ -0,0 +1,26 @@
+"""
+MCP 服务器共用的进程内 TTL 缓存工具
+缓存是普通字典，值为 (过期时间, 数据)，过期时间取自 time.monotonic()
+"""
+import time
+from typing import Any
+
+def cache_put(cache: dict[Any, tuple[float, Any]], key: Any, value: Any, ttl: float, maxsize: int) -> None:
+    """
+    写入 TTL 缓存；缓存已满时先清理过期条目，仍然已满则淘汰最早写入的条目
+    多线程共享的缓存需由调用方持锁调用
+    :param cache: 缓存字典，值为 (过期时间, 数据)
+    :param key: 缓存键
+    :param value: 缓存数据
+    :param ttl: 有效期（秒）
+    :param maxsize: 缓存最多保留的条目数
+    """
+    now = time.monotonic()
+    # 先删除旧值，使重新写入的键排到最后，按写入顺序淘汰
+    cache.pop(key, None)
+    if len(cache) >= maxsize:
+        for expired_key in [k for k, (expires, _) in cache.items() if expires <= now]:
+            del cache[expired_key]
+        while len(cache) >= maxsize:
+            del cache[next(iter(cache))]
+    cache[key] = (now + ttl, value)
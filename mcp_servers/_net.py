@@ -0,0 +1,130 @@
+"""
+MCP 服务器共用的网络请求工具：指数退避重试与按主机限流
+"""
+import asyncio
+import email.utils
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+from urllib.parse import urlsplit
+import httpx
+
+# 需要重试的 HTTP 状态码：限流与服务端错误
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# 每个主机同时进行的请求上限，避免触发上游的连接数限制
+MAX_REQUESTS_PER_HOST = 8
+
+# 服务端通过 Retry-After 要求等待时，最长等待的秒数
+MAX_RETRY_AFTER = 10.0
+
+# 主机名 -> 限流信号量
+_host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    """
+    获取 URL 所属主机的限流信号量
+    :param url: 请求地址
+    :return: 该主机共享的信号量
+    """
+    host = urlsplit(url).hostname or ""
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = _host_semaphores[host] = asyncio.Semaphore(MAX_REQUESTS_PER_HOST)
+    return semaphore
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """
+    解析响应中的 Retry-After 头，支持秒数和 HTTP 日期两种格式
+    :param response: HTTP 响应
+    :return: 需要等待的秒数；没有或无法解析时返回 None
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return retry_at.timestamp() - time.time()
+
+async def retry_async(
+    request_fn: Callable[[], Awaitable[httpx.Response]], *, retries: int = 3, base_delay: float = 0.25
+) -> httpx.Response:
+    """
+    执行 HTTP 请求，遇到超时、网络错误、429 或 5xx 时按指数退避重试
+    :param request_fn: 每次调用发起一次请求的协程函数
+    :param retries: 最多尝试次数
+    :param base_delay: 退避的基础等待秒数，第 n 次重试等待 base_delay * 2**n 再加随机抖动
+    :return: 最后一次请求的响应（可能仍是 429/5xx，由调用方决定如何处理）
+    """
+    for attempt in range(retries):
+        last_attempt = attempt == retries - 1
+        retry_after = None
+        try:
+            response = await request_fn()
+        except httpx.TransportError:
+            if last_attempt:
+                raise
+        else:
+            if last_attempt or response.status_code not in RETRYABLE_STATUS_CODES:
+                return response
+            retry_after = _retry_after_seconds(response)
+
+        if retry_after is not None:
+            delay = min(max(retry_after, 0.0), MAX_RETRY_AFTER)
+        else:
+            delay = base_delay * 2 ** attempt + random.uniform(0, base_delay)
+        await asyncio.sleep(delay)
+    raise ValueError("retries 必须大于 0")
+
+async def get_with_retry(client: httpx.AsyncClient, url: str, **kwargs: Any) -> httpx.Response:
+    """
+    在目标主机的并发限制内发起 GET 请求，并在失败时自动重试
+    :param client: 共享的 HTTP 客户端
+    :param url: 请求地址
+    :param kwargs: 传给 client.get 的其他参数
+    :return: HTTP 响应
+    """
+    async with _host_semaphore(url):
+        return await retry_async(lambda: client.get(url, **kwargs))
+
+class SharedAsyncClient:
+    """
+    服务器内共享的 HTTP 客户端：首次使用时创建，会话结束时关闭，下一个会话使用时重新创建
+    FastMCP 每个会话都会进入一次 lifespan，因此客户端不能在导入时创建后被永久关闭
+    """
+
+    def __init__(self, **client_kwargs: Any) -> None:
+        """
+        :param client_kwargs: 创建 httpx.AsyncClient 时使用的参数（超时、请求头、连接池限制等）
+        """
+        self._client_kwargs = client_kwargs
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def client(self) -> httpx.AsyncClient:
+        """
+        获取共享的 HTTP 客户端，首次调用时创建
+        :return: httpx.AsyncClient 实例
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(**self._client_kwargs)
+        return self._client
+
+    @asynccontextmanager
+    async def lifespan(self, server: Any) -> AsyncIterator[None]:
+        """
+        作为 FastMCP 的 lifespan 使用，会话结束时释放连接池
+        :param server: FastMCP 服务器实例
+        """
+        try:
+            yield
+        finally:
+            if self._client is not None:
+                await self._client.aclose()
+                self._client = None
@@ -1,31 +1,139 @@
 import os
+import sys
 import json
-import whois
-from datetime import datetime
-from typing import Any
+import atexit
+import asyncio
+import re
+import threading
+import time
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
 
+try:
+    from mcp_servers._cache import cache_put
+except ImportError:
+    # 以脚本方式运行（python mcp_servers/getDomainInfo_server.py）时从同目录导入
+    from _cache import cache_put
+
 # 初始化 MCP 服务器
 mcp = FastMCP("DomainInfoServer")
 
 # 加载环境变量
 load_dotenv()
 
+# 批量查询时同时进行的 WHOIS 请求上限，避免触发注册局的频率限制
+WHOIS_MAX_CONCURRENCY = int(os.getenv("WHOIS_MAX_CONCURRENCY", "8"))
+
+# whois 模块加载时会读取 TLD 表，改为首次查询时再导入，缩短服务器冷启动时间
+_whois = None
+
+def _get_whois():
+    """
+    延迟导入 whois 模块
+    :return: whois 模块
+    """
+    global _whois
+    if _whois is None:
+        import whois as _whois_mod
+        _whois = _whois_mod
+    return _whois
+
+# WHOIS 结果缓存时间（秒），注册信息很少变化，默认缓存 1 小时
+WHOIS_CACHE_TTL = float(os.getenv("WHOIS_CACHE_TTL", "3600"))
+# 查询失败结果的缓存时间（秒），短时间内重复查询同一域名时不再反复等待失败的 WHOIS 服务器
+WHOIS_NEGATIVE_CACHE_TTL = float(os.getenv("WHOIS_NEGATIVE_CACHE_TTL", "60"))
+
+# WHOIS 缓存最多保留的域名数
+WHOIS_CACHE_MAXSIZE = 4096
+
+# 域名 -> (过期时间, 域名数据)；查询在线程池中执行，需要加锁
+_whois_cache: dict[str, tuple[float, dict[str, Any]]] = {}
+_whois_cache_lock = threading.Lock()
+
+def _store_domain_info(key: str, data: dict[str, Any], ttl: float) -> None:
+    """
+    在锁保护下写入 WHOIS 缓存
+    :param key: 缓存键（小写域名）
+    :param data: 域名数据字典
+    :param ttl: 有效期（秒）
+    """
+    with _whois_cache_lock:
+        cache_put(_whois_cache, key, data, ttl, WHOIS_CACHE_MAXSIZE)
+
+# WHOIS 查询专用线程池大小；默认线程池只有 min(32, CPU 数 + 4) 个线程，不足以支撑大批量查询
+WHOIS_THREAD_POOL_SIZE = 64
+_whois_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_whois_executor() -> ThreadPoolExecutor:
+    """
+    获取 WHOIS 查询专用线程池，首次调用时创建并在进程退出时关闭
+    :return: 线程池
+    """
+    global _whois_executor
+    if _whois_executor is None:
+        _whois_executor = ThreadPoolExecutor(
+            max_workers=WHOIS_THREAD_POOL_SIZE, thread_name_prefix="whois"
+        )
+        atexit.register(_whois_executor.shutdown, wait=False)
+    return _whois_executor
+
+def current_query_time() -> str:
+    """
+    获取当前本地时间，格式为 ISO 8601（精确到秒）
+    :return: 时间字符串，如 2024-01-01T12:00:00
+    """
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime())
+
 """
 查询域名注册状态和基本信息
 :param domain: 域名
 :return: 域名信息字典或含 error 的字典
 """
-def fetch_domain_info(domain: str) -> dict[str, Any]:
+def fetch_domain_info(domain: str, query_time: Optional[str] = None) -> dict[str, Any]:
+    """
+    查询域名信息，优先使用缓存中未过期的 WHOIS 结果（包括短期缓存的失败结果）
+    :param domain: 域名（如 google.com）
+    :param query_time: 查询时间字符串，批量查询时由调用方统一传入；为空时取当前时间
+    :return: 域名数据字典；若出错返回包含 error 信息的字典
+    """
+    cached = get_cached_domain_info(domain)
+    if cached is not None:
+        return cached
+
+    data = query_whois(domain, query_time)
+    # 查询失败的结果只短暂缓存，过期后重新查询
+    ttl = WHOIS_NEGATIVE_CACHE_TTL if "error" in data else WHOIS_CACHE_TTL
+    _store_domain_info(domain.strip().lower(), data, ttl)
+    return data
+
+def get_cached_domain_info(domain: str) -> Optional[dict[str, Any]]:
+    """
+    从缓存中读取未过期的域名信息
+    :param domain: 域名
+    :return: 缓存的域名数据字典；未命中或已过期时返回 None
+    """
+    with _whois_cache_lock:
+        cached = _whois_cache.get(domain.strip().lower())
+    if cached and time.monotonic() < cached[0]:
+        return cached[1]
+    return None
+
+def query_whois(domain: str, query_time: Optional[str] = None) -> dict[str, Any]:
     """
     从 WHOIS 查询域名信息
     :param domain: 域名（如 google.com）
+    :param query_time: 查询时间字符串；为空时取当前时间
     :return: 域名数据字典；若出错返回包含 error 信息的字典
     """
+    if query_time is None:
+        query_time = current_query_time()
+
     try:
         # 查询域名信息
-        domain_info = whois.whois(domain)
+        domain_info = _get_whois().whois(domain)
         
         # 判断域名是否被注册
         is_registered = domain_info.status is not None and len(domain_info.status) > 0
@@ -38,7 +146,7 @@ def fetch_domain_info(domain: str) -> dict[str, Any]:
             'creation_date': domain_info.creation_date,
             'expiration_date': domain_info.expiration_date,
             'name_servers': domain_info.name_servers,
-            'query_time': datetime.now().isoformat()
+            'query_time': query_time
         }
         
         return result
@@ -47,9 +155,65 @@ def fetch_domain_info(domain: str) -> dict[str, Any]:
         return {
             'domain': domain,
             'error': str(e),
-            'query_time': datetime.now().isoformat()
+            'query_time': query_time
         }
 
+# 域名信息的输出模板，在模块加载时构建一次
+_DOMAIN_INFO_TEMPLATE = """🌐 域名查询结果: {domain}
+
+📊 基本信息:
+  ✅ 注册状态: {registered_text}
+  🏢 注册商: {registrar}
+  📅 创建时间: {creation_date}
+  ⏰ 过期时间: {expiration_date}
+
+🔒 域名状态:
+{status_text}
+
+🌍 域名服务器:
+{ns_text}
+
+⏱️ 查询时间: {query_time}"""
+_NO_STATUS_TEXT = "  • 无状态信息"
+_NO_NS_TEXT = "  • 无服务器信息"
+
+# 域名可用性检查的输出模板
+_DOMAIN_UNAVAILABLE_TEMPLATE = """
+🔴 域名不可用: {domain}
+
+该域名已被注册:
+  • 注册商: {registrar}
+  • 过期时间: {expiration_date}
+
+💡 建议: 尝试其他域名变体或选择不同的顶级域名
+"""
+_DOMAIN_AVAILABLE_TEMPLATE = """
+🟢 域名可用: {domain}
+
+恭喜！该域名目前未被注册，可以尝试注册。
+
+💡 下一步: 尽快在域名注册商处注册该域名
+"""
+
+# 批量查询输入的分词规则：逗号或空白分隔的每一段视为一个域名（兼容中文等国际化域名）
+_DOMAIN_TOKEN_RE = re.compile(r"[^\s,]+")
+
+# 批量查询结果的汇总标题和分隔线
+_BATCH_HEADER_FMT = "📊 批量域名查询结果汇总（共 {} 个域名）\n" + "=" * 60 + "\n\n"
+_BATCH_SEPARATOR = "\n" + "=" * 60 + "\n"
+
+def _format_date(date_val: Any) -> str:
+    """
+    格式化 WHOIS 返回的日期，返回多个日期时取第一个
+    :param date_val: 日期、日期列表或空值
+    :return: 日期字符串
+    """
+    if isinstance(date_val, list):
+        date_val = date_val[0] if date_val else None
+    if not date_val:
+        return "未知"
+    return str(date_val)
+
 def format_domain_info(data: dict[str, Any]) -> str:
     """
     将域名数据格式化为易读文本
@@ -85,37 +249,45 @@ def format_domain_info(data: dict[str, Any]) -> str:
         else:
             ns_text = f"  • {name_servers}"
 
-    # 格式化日期信息
-    def format_date(date_val):
-        if not date_val:
-            return "未知"
-        if isinstance(date_val, list):
-            return str(date_val[0]) if date_val else "未知"
-        return str(date_val)
-
-    creation_date_fmt = format_date(creation_date)
-    expiration_date_fmt = format_date(expiration_date)
-
     # 构建结果字符串
-    result = f"""
-🌐 域名查询结果: {domain}
-
-📊 基本信息:
-  ✅ 注册状态: {'已注册' if is_registered else '未注册'}
-  🏢 注册商: {registrar}
-  📅 创建时间: {creation_date_fmt}
-  ⏰ 过期时间: {expiration_date_fmt}
-
-🔒 域名状态:
-{status_text if status_text else "  • 无状态信息"}
-
-🌍 域名服务器:
-{ns_text if ns_text else "  • 无服务器信息"}
+    return _DOMAIN_INFO_TEMPLATE.format(
+        domain=domain,
+        registered_text="已注册" if is_registered else "未注册",
+        registrar=registrar,
+        creation_date=_format_date(creation_date),
+        expiration_date=_format_date(expiration_date),
+        status_text=status_text or _NO_STATUS_TEXT,
+        ns_text=ns_text or _NO_NS_TEXT,
+        query_time=query_time,
+    )
+
+async def fetch_domain_info_async(domain: str, query_time: Optional[str] = None) -> dict[str, Any]:
+    """
+    异步查询域名信息，阻塞的 WHOIS 查询在专用线程池中执行，不占用事件循环
+    :param domain: 域名
+    :param query_time: 查询时间字符串；为空时取当前时间
+    :return: 域名数据字典；若出错返回包含 error 信息的字典
+    """
+    # 缓存命中时只是一次字典查找，直接在事件循环中返回，省去线程切换
+    cached = get_cached_domain_info(domain)
+    if cached is not None:
+        return cached
 
-⏱️ 查询时间: {query_time}
-"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_whois_executor(), fetch_domain_info, domain, query_time)
 
-    return result.strip()
+async def fetch_domain_info_limited(
+    domain: str, semaphore: asyncio.Semaphore, query_time: Optional[str] = None
+) -> dict[str, Any]:
+    """
+    异步查询域名信息，并通过信号量限制并发数
+    :param domain: 域名
+    :param semaphore: 控制并发的信号量
+    :param query_time: 查询时间字符串；为空时取当前时间
+    :return: 域名数据字典；若出错返回包含 error 信息的字典
+    """
+    async with semaphore:
+        return await fetch_domain_info_async(domain, query_time)
 
 """
 查询域名WHOIS信息
@@ -123,7 +295,7 @@ def format_domain_info(data: dict[str, Any]) -> str:
 :return: 格式化的域名信息
 """
 @mcp.tool()
-async def query_domain(domain: str) -> str:
+async def query_domain(domain: str, format: str = "text") -> str:
     """
     输入域名，返回WHOIS查询结果，包括注册状态、注册商、创建时间、过期时间等信息。
 
@@ -138,9 +310,13 @@ async def query_domain(domain: str) -> str:
     - "example-test-123456.com" -> 返回未注册域名的信息
 
     :param domain: 域名（如 google.com）
+    :param format: 输出格式，"text"（默认，易读文本）或 "json"（原始数据，便于程序解析）
     :return: 格式化后的域名信息
     """
-    data = fetch_domain_info(domain)
+    data = await fetch_domain_info_async(domain)
+    if format == "json":
+        # orjson 原生支持 datetime，其余无法序列化的值转为字符串
+        return orjson.dumps(data, default=str).decode()
     return format_domain_info(data)
 
 """
@@ -154,38 +330,50 @@ async def batch_query_domains(domains: str) -> str:
     批量查询多个域名的WHOIS信息。
 
     使用说明:
-    - 支持以逗号分隔的域名列表
-    - 每个域名都会单独查询并返回结果
+    - 支持以逗号或空白（空格、换行）分隔的域名列表
+    - 每个域名都会单独查询并返回结果，重复的域名只查询一次
     - 适合需要比较多个域名状态的场景
 
     示例:
     - "google.com,github.com,baidu.com"
     - "example.com,example.net,example.org"
 
-    :param domains: 域名列表，用逗号分隔（如 "google.com,github.com"）
+    :param domains: 域名列表，用逗号或空白分隔（如 "google.com,github.com"）
     :return: 批量查询结果汇总
     """
-    # 处理输入，支持逗号分隔的字符串
+    # 处理输入，支持逗号或空白分隔的字符串；统一转为小写，便于去重和命中缓存
     if isinstance(domains, str):
-        domain_list = [d.strip() for d in domains.split(',') if d.strip()]
+        domain_list = _DOMAIN_TOKEN_RE.findall(domains.lower())
     else:
-        domain_list = domains
+        domain_list = [d.strip().lower() for d in domains if d.strip()]
 
     if not domain_list:
         return "❌ 请输入有效的域名列表"
 
-    results = []
-    for domain in domain_list:
-        data = fetch_domain_info(domain)
-        formatted = format_domain_info(data)
-        results.append(formatted)
+    # 重复的域名只查询一次，dict.fromkeys 去重时保留首次出现的顺序
+    unique_domains = list(dict.fromkeys(domain_list))
+
+    # 并发查询所有域名，gather 会按输入顺序返回结果；同一批次共用一个查询时间
+    semaphore = asyncio.Semaphore(WHOIS_MAX_CONCURRENCY)
+    query_time = current_query_time()
+    datas = await asyncio.gather(
+        *(fetch_domain_info_limited(domain, semaphore, query_time) for domain in unique_domains),
+        return_exceptions=True,
+    )
+    # 每个域名只格式化一次；单个域名查询异常时记为该域名的错误结果，不影响其他域名
+    formatted_map = {
+        domain: format_domain_info(
+            {'domain': domain, 'error': str(data), 'query_time': query_time}
+            if isinstance(data, Exception) else data
+        )
+        for domain, data in zip(unique_domains, datas)
+    }
+
+    # 按原始输入顺序输出，重复的域名复用同一份格式化结果
+    results = [formatted_map[domain] for domain in domain_list]
     
-    # 汇总结果
-    summary = f"📊 批量域名查询结果汇总（共 {len(domain_list)} 个域名）\n"
-    summary += "=" * 60 + "\n\n"
-    summary += "\n" + "=" * 60 + "\n".join(results)
-    
-    return summary
+    # 汇总结果，各域名结果之间用分隔线隔开
+    return _BATCH_HEADER_FMT.format(len(domain_list)) + _BATCH_SEPARATOR.join(results)
 
 """
 检查域名是否可用（未注册）
@@ -208,7 +396,7 @@ async def check_domain_availability(domain: str) -> str:
     :param domain: 要检查的域名
     :return: 域名可用性检查结果
     """
-    data = fetch_domain_info(domain)
+    data = await fetch_domain_info_async(domain)
     
     if "error" in data:
         return f"❌ 检查域名 {domain} 时出错: {data['error']}"
@@ -217,33 +405,18 @@ async def check_domain_availability(domain: str) -> str:
     domain_name = data.get("domain", domain)
     
     if is_registered:
-        registrar = data.get("registrar", "未知注册商")
-        expiration_date = data.get("expiration_date", "未知")
-        
-        # 格式化过期日期
-        if isinstance(expiration_date, list) and expiration_date:
-            exp_date = expiration_date[0]
-        else:
-            exp_date = expiration_date
-        
-        return f"""
-🔴 域名不可用: {domain_name}
-
-该域名已被注册:
-  • 注册商: {registrar}
-  • 过期时间: {exp_date}
-
-💡 建议: 尝试其他域名变体或选择不同的顶级域名
-"""
+        return _DOMAIN_UNAVAILABLE_TEMPLATE.format(
+            domain=domain_name,
+            registrar=data.get("registrar", "未知注册商"),
+            expiration_date=_format_date(data.get("expiration_date")),
+        )
     else:
-        return f"""
-🟢 域名可用: {domain_name}
-
-恭喜！该域名目前未被注册，可以尝试注册。
-
-💡 下一步: 尽快在域名注册商处注册该域名
-"""
+        return _DOMAIN_AVAILABLE_TEMPLATE.format(domain=domain_name)
 
 if __name__ == "__main__":
+    # 设置 MCP_DRYRUN 时只检查模块及依赖能否正常加载，随后直接退出（供 test_server.py 使用）
+    if os.environ.get("MCP_DRYRUN"):
+        _get_whois()
+        sys.exit(0)
     # 以标准 I/O 方式运行 MCP 服务器
     mcp.run(transport="stdio")
\ No newline at end of file
@@ -1,7 +1,11 @@
 import os
+import sys
+import asyncio
 import json
+import time
+import functools
 import platform
-import psutil
+import orjson
 from datetime import datetime
 from typing import Any
 from mcp.server.fastmcp import FastMCP
@@ -9,39 +13,109 @@ from mcp.server.fastmcp import FastMCP
 # 初始化 MCP 服务器
 mcp = FastMCP("SystemInfoServer")
 
+# 系统信息缓存时间（秒），连续调用时直接复用上一次的结果
+SYSINFO_CACHE_TTL = 2.0
+_SYSINFO_CACHE: dict[str, Any] = {"ts": 0.0, "data": None}
+
+# 字节单位换算
+_MB = 1 << 20
+_GB = 1 << 30
+
+# 不统计使用情况的伪文件系统/只读镜像（如 snap 的 squashfs），避免大量无意义的 statvfs 调用
+_SKIP_FS = frozenset({"squashfs", "overlay", "tmpfs", "devtmpfs", "proc", "sysfs", "cgroup", "cgroup2"})
+
+# psutil 导入时会扫描 /proc，改为首次获取系统信息时再导入，缩短服务器冷启动时间
+_psutil = None
+
+# 首次采集 CPU 使用率时的采样时长（秒），之后使用 interval=None 获取距上次调用以来的使用率
+_CPU_FIRST_SAMPLE_INTERVAL = 0.5
+_cpu_sampled = False
+
+def _get_psutil():
+    """
+    延迟导入 psutil 模块
+    :return: psutil 模块
+    """
+    global _psutil
+    if _psutil is None:
+        import psutil as _psutil_mod
+        _psutil = _psutil_mod
+    return _psutil
+
+def _cpu_usage_percent(psutil) -> float:
+    """
+    获取 CPU 使用率，只有第一次调用需要阻塞采样，之后无需等待
+    :param psutil: psutil 模块
+    :return: CPU 使用率百分比
+    """
+    global _cpu_sampled
+    if _cpu_sampled:
+        return psutil.cpu_percent(interval=None)
+    _cpu_sampled = True
+    return psutil.cpu_percent(interval=_CPU_FIRST_SAMPLE_INTERVAL)
+
+@functools.cache
+def _static_platform_info() -> dict[str, dict[str, str]]:
+    """
+    获取运行期间不会变化的平台和 Python 信息，只计算一次。
+    :return: 包含 platform 和 python 信息的字典
+    """
+    return {
+        "platform": {
+            "system": platform.system(),
+            "release": platform.release(),
+            "version": platform.version(),
+            "platform": platform.platform(),
+            "architecture": platform.architecture()[0],
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+        },
+        "python": {
+            "version": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "compiler": platform.python_compiler(),
+        },
+    }
+
+def get_cached_system_info() -> dict[str, Any] | None:
+    """
+    读取未过期的系统信息缓存
+    :return: 缓存的系统信息字典；未命中或已过期时返回 None
+    """
+    if _SYSINFO_CACHE["data"] is not None and time.monotonic() - _SYSINFO_CACHE["ts"] < SYSINFO_CACHE_TTL:
+        return _SYSINFO_CACHE["data"]
+    return None
+
 def get_system_info() -> dict[str, Any]:
     """
-    获取本地操作系统的详细软硬件信息。
+    获取本地操作系统的详细软硬件信息，短时间内的重复调用直接返回缓存结果。
     :return: 包含系统信息的字典
     """
+    cached = get_cached_system_info()
+    if cached is not None:
+        return cached
+
     try:
+        psutil = _get_psutil()
+
+        # 每类指标只采集一次，避免重复读取 /proc
+        freq = psutil.cpu_freq()
+        vm = psutil.virtual_memory()
+
         # 系统基本信息
         system_info = {
-            "platform": {
-                "system": platform.system(),
-                "release": platform.release(),
-                "version": platform.version(),
-                "platform": platform.platform(),
-                "architecture": platform.architecture()[0],
-                "machine": platform.machine(),
-                "processor": platform.processor(),
-            },
-            "python": {
-                "version": platform.python_version(),
-                "implementation": platform.python_implementation(),
-                "compiler": platform.python_compiler(),
-            },
+            **_static_platform_info(),
             "cpu": {
                 "physical_cores": psutil.cpu_count(logical=False),
                 "total_cores": psutil.cpu_count(logical=True),
-                "max_frequency": f"{psutil.cpu_freq().current:.2f} MHz" if psutil.cpu_freq() else "N/A",
-                "usage_percent": f"{psutil.cpu_percent(interval=1)}%",
+                "max_frequency": f"{freq.current:.2f} MHz" if freq else "N/A",
+                "usage_percent": f"{_cpu_usage_percent(psutil)}%",
             },
             "memory": {
-                "total": f"{psutil.virtual_memory().total / (1024**3):.2f} GB",
-                "available": f"{psutil.virtual_memory().available / (1024**3):.2f} GB",
-                "used": f"{psutil.virtual_memory().used / (1024**3):.2f} GB",
-                "usage_percent": f"{psutil.virtual_memory().percent}%",
+                "total": f"{vm.total / _GB:.2f} GB",
+                "available": f"{vm.available / _GB:.2f} GB",
+                "used": f"{vm.used / _GB:.2f} GB",
+                "usage_percent": f"{vm.percent}%",
             },
             "disk": {},
             "network": {},
@@ -50,14 +124,17 @@ def get_system_info() -> dict[str, Any]:
         # 磁盘信息
         disk_partitions = psutil.disk_partitions()
         for partition in disk_partitions:
+            # 跳过伪文件系统和 loop 设备
+            if partition.fstype in _SKIP_FS or partition.device.startswith("/dev/loop"):
+                continue
             try:
                 partition_usage = psutil.disk_usage(partition.mountpoint)
                 system_info["disk"][partition.device] = {
                     "mountpoint": partition.mountpoint,
                     "fstype": partition.fstype,
-                    "total_size": f"{partition_usage.total / (1024**3):.2f} GB",
-                    "used": f"{partition_usage.used / (1024**3):.2f} GB",
-                    "free": f"{partition_usage.free / (1024**3):.2f} GB",
+                    "total_size": f"{partition_usage.total / _GB:.2f} GB",
+                    "used": f"{partition_usage.used / _GB:.2f} GB",
+                    "free": f"{partition_usage.free / _GB:.2f} GB",
                     "usage_percent": f"{partition_usage.percent}%",
                 }
             except PermissionError:
@@ -67,8 +144,8 @@ def get_system_info() -> dict[str, Any]:
         # 网络信息
         net_io = psutil.net_io_counters()
         system_info["network"] = {
-            "bytes_sent": f"{net_io.bytes_sent / (1024**2):.2f} MB",
-            "bytes_recv": f"{net_io.bytes_recv / (1024**2):.2f} MB",
+            "bytes_sent": f"{net_io.bytes_sent / _MB:.2f} MB",
+            "bytes_recv": f"{net_io.bytes_recv / _MB:.2f} MB",
             "packets_sent": net_io.packets_sent,
             "packets_recv": net_io.packets_recv,
         }
@@ -77,6 +154,8 @@ def get_system_info() -> dict[str, Any]:
         boot_time = psutil.boot_time()
         system_info["boot_time"] = f"{datetime.fromtimestamp(boot_time).strftime('%Y-%m-%d %H:%M:%S')}"
 
+        _SYSINFO_CACHE["ts"] = time.monotonic()
+        _SYSINFO_CACHE["data"] = system_info
         return system_info
 
     except Exception as e:
@@ -92,66 +171,66 @@ def format_system_info(data: dict[str, Any]) -> str:
         return f"⚠️ {data['error']}"
 
     try:
-        output = "🖥️ 系统信息概览\n\n"
+        parts = ["🖥️ 系统信息概览\n\n"]
         
         # 平台信息
         platform_info = data["platform"]
-        output += "📋 操作系统信息:\n"
-        output += f"  系统: {platform_info['system']} {platform_info['release']}\n"
-        output += f"  版本: {platform_info['version']}\n"
-        output += f"  平台: {platform_info['platform']}\n"
-        output += f"  架构: {platform_info['architecture']}\n"
-        output += f"  处理器: {platform_info['processor']}\n\n"
+        parts.append("📋 操作系统信息:\n")
+        parts.append(f"  系统: {platform_info['system']} {platform_info['release']}\n")
+        parts.append(f"  版本: {platform_info['version']}\n")
+        parts.append(f"  平台: {platform_info['platform']}\n")
+        parts.append(f"  架构: {platform_info['architecture']}\n")
+        parts.append(f"  处理器: {platform_info['processor']}\n\n")
 
         # Python 信息
         python_info = data["python"]
-        output += "🐍 Python 环境:\n"
-        output += f"  版本: {python_info['version']}\n"
-        output += f"  实现: {python_info['implementation']}\n"
-        output += f"  编译器: {python_info['compiler']}\n\n"
+        parts.append("🐍 Python 环境:\n")
+        parts.append(f"  版本: {python_info['version']}\n")
+        parts.append(f"  实现: {python_info['implementation']}\n")
+        parts.append(f"  编译器: {python_info['compiler']}\n\n")
 
         # CPU 信息
         cpu_info = data["cpu"]
-        output += "⚡ CPU 信息:\n"
-        output += f"  物理核心: {cpu_info['physical_cores']}\n"
-        output += f"  逻辑核心: {cpu_info['total_cores']}\n"
-        output += f"  最大频率: {cpu_info['max_frequency']}\n"
-        output += f"  当前使用率: {cpu_info['usage_percent']}\n\n"
+        parts.append("⚡ CPU 信息:\n")
+        parts.append(f"  物理核心: {cpu_info['physical_cores']}\n")
+        parts.append(f"  逻辑核心: {cpu_info['total_cores']}\n")
+        parts.append(f"  最大频率: {cpu_info['max_frequency']}\n")
+        parts.append(f"  当前使用率: {cpu_info['usage_percent']}\n\n")
 
         # 内存信息
         memory_info = data["memory"]
-        output += "💾 内存信息:\n"
-        output += f"  总内存: {memory_info['total']}\n"
-        output += f"  可用内存: {memory_info['available']}\n"
-        output += f"  已使用: {memory_info['used']}\n"
-        output += f"  使用率: {memory_info['usage_percent']}\n\n"
+        parts.append("💾 内存信息:\n")
+        parts.append(f"  总内存: {memory_info['total']}\n")
+        parts.append(f"  可用内存: {memory_info['available']}\n")
+        parts.append(f"  已使用: {memory_info['used']}\n")
+        parts.append(f"  使用率: {memory_info['usage_percent']}\n\n")
 
         # 磁盘信息
         disk_info = data["disk"]
-        output += "💿 磁盘信息:\n"
+        parts.append("💿 磁盘信息:\n")
         for device, info in disk_info.items():
-            output += f"  {device} ({info['fstype']}):\n"
-            output += f"    挂载点: {info['mountpoint']}\n"
-            output += f"    总大小: {info['total_size']}\n"
-            output += f"    已使用: {info['used']} ({info['usage_percent']})\n"
-            output += f"    可用空间: {info['free']}\n"
+            parts.append(f"  {device} ({info['fstype']}):\n")
+            parts.append(f"    挂载点: {info['mountpoint']}\n")
+            parts.append(f"    总大小: {info['total_size']}\n")
+            parts.append(f"    已使用: {info['used']} ({info['usage_percent']})\n")
+            parts.append(f"    可用空间: {info['free']}\n")
 
         # 网络信息
         network_info = data["network"]
-        output += "\n🌐 网络信息:\n"
-        output += f"  发送: {network_info['bytes_sent']}\n"
-        output += f"  接收: {network_info['bytes_recv']}\n"
+        parts.append("\n🌐 网络信息:\n")
+        parts.append(f"  发送: {network_info['bytes_sent']}\n")
+        parts.append(f"  接收: {network_info['bytes_recv']}\n")
 
         # 启动时间
-        output += f"\n⏰ 系统启动时间: {data['boot_time']}"
+        parts.append(f"\n⏰ 系统启动时间: {data['boot_time']}")
 
-        return output
+        return "".join(parts)
 
     except Exception as e:
         return f"格式化系统信息时出错: {str(e)}"
 
 @mcp.tool()
-async def get_system_information() -> str:
+async def get_system_information(format: str = "text") -> str:
     """
     获取本地操作系统的详细软硬件信息。
     
@@ -163,11 +242,21 @@ async def get_system_information() -> str:
     - 获取网络统计信息
     - 获取系统启动时间
     
+    :param format: 输出格式，"text"（默认，易读文本）或 "json"（原始数据，便于程序解析）
     :return: 格式化的系统信息报告
     """
-    data = get_system_info()
+    # 缓存命中时直接返回；未命中时的采集包含首次 CPU 采样的阻塞等待和大量系统调用，放到线程中执行，避免阻塞事件循环
+    data = get_cached_system_info()
+    if data is None:
+        data = await asyncio.to_thread(get_system_info)
+    if format == "json":
+        return orjson.dumps(data).decode()
     return format_system_info(data)
 
 if __name__ == "__main__":
+    # 设置 MCP_DRYRUN 时只检查模块及依赖能否正常加载，随后直接退出（供 test_server.py 使用）
+    if os.environ.get("MCP_DRYRUN"):
+        _get_psutil()
+        sys.exit(0)
     # 以标准 I/O 方式运行 MCP 服务器
     mcp.run(transport="stdio")
\ No newline at end of file
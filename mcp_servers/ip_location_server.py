@@ -1,11 +1,30 @@
+import os
+import sys
+import ipaddress
 import json
-import re
+import orjson
 from typing import Any, Dict, Optional
 import httpx
 from mcp.server.fastmcp import FastMCP
 
+try:
+    from mcp_servers._net import SharedAsyncClient, get_with_retry
+except ImportError:
+    # 以脚本方式运行（python mcp_servers/ip_location_server.py）时从同目录导入
+    from _net import SharedAsyncClient, get_with_retry
+
+SERVER_VERSION = "1.0"
+USER_AGENT = f"ip-location-server/{SERVER_VERSION}"
+
+# 模块级共享的 HTTP 客户端，复用 keep-alive 连接，避免每次请求重新握手
+_http = SharedAsyncClient(
+    timeout=10.0,
+    headers={"User-Agent": USER_AGENT},
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+)
+
 # 初始化 MCP 服务器
-mcp = FastMCP("IPLocationServer")
+mcp = FastMCP("IPLocationServer", lifespan=_http.lifespan)
 
 def validate_ip_address(ip: str) -> bool:
     """
@@ -13,13 +32,46 @@ def validate_ip_address(ip: str) -> bool:
     :param ip: IP地址字符串
     :return: 是否为有效的IP地址
     """
-    # IPv4 正则表达式
-    ipv4_pattern = r'^(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$'
-    
-    # IPv6 正则表达式 (简化版)
-    ipv6_pattern = r'^(?:[0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}$|^::1$|^::$'
-    
-    return bool(re.match(ipv4_pattern, ip) or re.match(ipv6_pattern, ip))
+    # ipaddress 支持完整的 IPv4/IPv6 语法（含 :: 缩写、内嵌 IPv4 和 zone id）
+    try:
+        ipaddress.ip_address(ip)
+        return True
+    except ValueError:
+        return False
+
+def _build_ipapi_result(data: Dict[str, Any], ip: str) -> Dict[str, Any]:
+    """
+    将 ip-api.com 的响应整理为统一的位置信息字典
+    :param data: ip-api.com 返回的 JSON 数据
+    :param ip: 查询的IP地址
+    :return: 包含位置信息的字典
+    """
+    if data.get("status") == "success":
+        return {
+            "success": True,
+            "ip": ip,
+            "country": data.get("country", "未知"),
+            "country_code": data.get("countryCode", ""),
+            "region": data.get("regionName", "未知"),
+            "region_code": data.get("region", ""),
+            "city": data.get("city", "未知"),
+            "zip_code": data.get("zip", ""),
+            "latitude": data.get("lat", 0),
+            "longitude": data.get("lon", 0),
+            "timezone": data.get("timezone", ""),
+            "isp": data.get("isp", "未知"),
+            "organization": data.get("org", "未知"),
+            "as_number": data.get("as", ""),
+            "query_ip": data.get("query", ip),
+            "_src": "ipapi"
+        }
+    else:
+        return {
+            "success": False,
+            "ip": ip,
+            "error": data.get("message", "查询失败"),
+            "error_code": "API_ERROR"
+        }
 
 async def query_ip_location_ipapi(ip: str) -> Dict[str, Any]:
     """
@@ -30,37 +82,12 @@ async def query_ip_location_ipapi(ip: str) -> Dict[str, Any]:
     try:
         url = f"http://ip-api.com/json/{ip}?lang=zh-CN"
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get("status") == "success":
-                return {
-                    "success": True,
-                    "ip": ip,
-                    "country": data.get("country", "未知"),
-                    "country_code": data.get("countryCode", ""),
-                    "region": data.get("regionName", "未知"),
-                    "region_code": data.get("region", ""),
-                    "city": data.get("city", "未知"),
-                    "zip_code": data.get("zip", ""),
-                    "latitude": data.get("lat", 0),
-                    "longitude": data.get("lon", 0),
-                    "timezone": data.get("timezone", ""),
-                    "isp": data.get("isp", "未知"),
-                    "organization": data.get("org", "未知"),
-                    "as_number": data.get("as", ""),
-                    "query_ip": data.get("query", ip)
-                }
-            else:
-                return {
-                    "success": False,
-                    "ip": ip,
-                    "error": data.get("message", "查询失败"),
-                    "error_code": "API_ERROR"
-                }
-                
+        response = await get_with_retry(_http.client(), url)
+        response.raise_for_status()
+        data = response.json()
+        
+        return _build_ipapi_result(data, ip)
+        
     except httpx.TimeoutException:
         return {
             "success": False,
@@ -83,39 +110,41 @@ async def query_ip_location_ipapi(ip: str) -> Dict[str, Any]:
             "error_code": "UNKNOWN_ERROR"
         }
 
-async def query_ip_location_ipinfo(ip: str) -> Dict[str, Any]:
+async def query_ip_location_ipinfo(ip: Optional[str] = None) -> Dict[str, Any]:
     """
     使用 ipinfo.io 作为备用API查询IP归属地
-    :param ip: IP地址
+    :param ip: IP地址；为空时查询调用方自己的公网IP
     :return: 包含位置信息的字典
     """
     try:
-        url = f"https://ipinfo.io/{ip}/json"
+        url = f"https://ipinfo.io/{ip}/json" if ip else "https://ipinfo.io/json"
+        
+        response = await get_with_retry(_http.client(), url)
+        response.raise_for_status()
+        data = response.json()
+        if not ip:
+            ip = data.get("ip", "")
+        
+        # 解析位置信息
+        location = data.get("loc", "").split(",")
+        latitude = float(location[0]) if len(location) > 0 and location[0] else 0
+        longitude = float(location[1]) if len(location) > 1 and location[1] else 0
+        
+        return {
+            "success": True,
+            "ip": ip,
+            "country": data.get("country", "未知"),
+            "region": data.get("region", "未知"),
+            "city": data.get("city", "未知"),
+            "postal": data.get("postal", ""),
+            "latitude": latitude,
+            "longitude": longitude,
+            "timezone": data.get("timezone", ""),
+            "isp": data.get("org", "未知"),
+            "query_ip": data.get("ip", ip),
+            "_src": "ipinfo"
+        }
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
-            
-            # 解析位置信息
-            location = data.get("loc", "").split(",")
-            latitude = float(location[0]) if len(location) > 0 and location[0] else 0
-            longitude = float(location[1]) if len(location) > 1 and location[1] else 0
-            
-            return {
-                "success": True,
-                "ip": ip,
-                "country": data.get("country", "未知"),
-                "region": data.get("region", "未知"),
-                "city": data.get("city", "未知"),
-                "postal": data.get("postal", ""),
-                "latitude": latitude,
-                "longitude": longitude,
-                "timezone": data.get("timezone", ""),
-                "isp": data.get("org", "未知"),
-                "query_ip": data.get("ip", ip)
-            }
-            
     except Exception as e:
         return {
             "success": False,
@@ -124,65 +153,141 @@ async def query_ip_location_ipinfo(ip: str) -> Dict[str, Any]:
             "error_code": "BACKUP_API_ERROR"
         }
 
-def format_location_info(data: Dict[str, Any]) -> str:
+# 位置信息输出中的固定文本，模块加载时构建一次
+_LOCATION_HEADER = "🌍 IP归属地查询结果\n\n🔍 查询IP: "
+_LOCATION_SECTION = "\n\n📍 地理位置:\n  国家: "
+_NETWORK_SECTION = "\n🌐 网络信息:\n  ISP: "
+
+def _format_coordinates(lat: Any, lon: Any) -> str:
     """
-    格式化IP位置信息为易读文本
+    格式化经纬度，坐标均为 0 时视为未知并省略
+    :param lat: 纬度
+    :param lon: 经度
+    :return: 坐标信息文本
+    """
+    if lat == 0 and lon == 0:
+        return ""
+    return f"\n🗺️ 坐标信息:\n  纬度: {lat}\n  经度: {lon}\n"
+
+def _format_ipapi(data: Dict[str, Any]) -> str:
+    """
+    格式化 ip-api.com 的查询结果，字段均由 _build_ipapi_result 填充
     :param data: IP位置信息字典
     :return: 格式化后的位置信息字符串
     """
-    if not data.get("success"):
-        return f"❌ IP查询失败\n" \
-               f"IP地址: {data.get('ip', '未知')}\n" \
-               f"错误信息: {data.get('error', '未知错误')}"
-    
-    output = f"🌍 IP归属地查询结果\n\n"
-    output += f"🔍 查询IP: {data.get('query_ip', data.get('ip', '未知'))}\n\n"
+    country_code = f" ({data['country_code']})" if data["country_code"] else ""
+    region = data["region"]
+    if region:
+        region_code = f" ({data['region_code']})" if data["region_code"] else ""
+        region_line = f"  省份/州: {region}{region_code}\n"
+    else:
+        region_line = ""
+    zip_line = f"  邮编: {data['zip_code']}\n" if data["zip_code"] else ""
+    org_line = f"  组织: {data['organization']}\n" if data["organization"] else ""
+    as_line = f"  AS号: {data['as_number']}\n" if data["as_number"] else ""
+    timezone_line = f"\n⏰ 时区: {data['timezone']}\n" if data["timezone"] else ""
+    return (
+        f"{_LOCATION_HEADER}{data['query_ip']}{_LOCATION_SECTION}{data['country']}{country_code}\n"
+        f"{region_line}"
+        f"  城市: {data['city']}\n"
+        f"{zip_line}"
+        f"{_format_coordinates(data['latitude'], data['longitude'])}"
+        f"{_NETWORK_SECTION}{data['isp']}\n"
+        f"{org_line}{as_line}{timezone_line}"
+    )
+
+def _format_ipinfo(data: Dict[str, Any]) -> str:
+    """
+    格式化 ipinfo.io 的查询结果，该接口不提供国家/地区代码、组织和AS号
+    :param data: IP位置信息字典
+    :return: 格式化后的位置信息字符串
+    """
+    region_line = f"  省份/州: {data['region']}\n" if data["region"] else ""
+    zip_line = f"  邮编: {data['postal']}\n" if data["postal"] else ""
+    timezone_line = f"\n⏰ 时区: {data['timezone']}\n" if data["timezone"] else ""
+    return (
+        f"{_LOCATION_HEADER}{data['query_ip']}{_LOCATION_SECTION}{data['country']}\n"
+        f"{region_line}"
+        f"  城市: {data['city']}\n"
+        f"{zip_line}"
+        f"{_format_coordinates(data['latitude'], data['longitude'])}"
+        f"{_NETWORK_SECTION}{data['isp']}\n"
+        f"{timezone_line}"
+    )
+
+def _format_location_generic(data: Dict[str, Any]) -> str:
+    """
+    格式化来源未知的位置信息，逐个字段做容错处理
+    :param data: IP位置信息字典
+    :return: 格式化后的位置信息字符串
+    """
+    parts = [_LOCATION_HEADER, str(data.get('query_ip', data.get('ip', '未知'))), "\n\n"]
     
     # 地理位置信息
-    output += f"📍 地理位置:\n"
-    output += f"  国家: {data.get('country', '未知')}"
+    parts.append(f"📍 地理位置:\n")
+    parts.append(f"  国家: {data.get('country', '未知')}")
     if data.get('country_code'):
-        output += f" ({data.get('country_code')})"
-    output += f"\n"
+        parts.append(f" ({data.get('country_code')})")
+    parts.append(f"\n")
     
     if data.get('region'):
-        output += f"  省份/州: {data.get('region')}"
+        parts.append(f"  省份/州: {data.get('region')}")
         if data.get('region_code'):
-            output += f" ({data.get('region_code')})"
-        output += f"\n"
+            parts.append(f" ({data.get('region_code')})")
+        parts.append(f"\n")
     
-    output += f"  城市: {data.get('city', '未知')}\n"
+    parts.append(f"  城市: {data.get('city', '未知')}\n")
     
     if data.get('zip_code') or data.get('postal'):
         zip_code = data.get('zip_code') or data.get('postal')
-        output += f"  邮编: {zip_code}\n"
+        parts.append(f"  邮编: {zip_code}\n")
     
     # 坐标信息
     lat = data.get('latitude', 0)
     lon = data.get('longitude', 0)
     if lat != 0 or lon != 0:
-        output += f"\n🗺️ 坐标信息:\n"
-        output += f"  纬度: {lat}\n"
-        output += f"  经度: {lon}\n"
+        parts.append(f"\n🗺️ 坐标信息:\n")
+        parts.append(f"  纬度: {lat}\n")
+        parts.append(f"  经度: {lon}\n")
     
     # 网络信息
-    output += f"\n🌐 网络信息:\n"
-    output += f"  ISP: {data.get('isp', '未知')}\n"
+    parts.append(f"\n🌐 网络信息:\n")
+    parts.append(f"  ISP: {data.get('isp', '未知')}\n")
     
     if data.get('organization'):
-        output += f"  组织: {data.get('organization')}\n"
+        parts.append(f"  组织: {data.get('organization')}\n")
     
     if data.get('as_number'):
-        output += f"  AS号: {data.get('as_number')}\n"
+        parts.append(f"  AS号: {data.get('as_number')}\n")
     
     # 时区信息
     if data.get('timezone'):
-        output += f"\n⏰ 时区: {data.get('timezone')}\n"
+        parts.append(f"\n⏰ 时区: {data.get('timezone')}\n")
     
-    return output
+    return "".join(parts)
+
+# 查询结果来源 -> 专用格式化函数
+_LOCATION_FORMATTERS = {
+    "ipapi": _format_ipapi,
+    "ipinfo": _format_ipinfo,
+}
+
+def format_location_info(data: Dict[str, Any]) -> str:
+    """
+    格式化IP位置信息为易读文本
+    :param data: IP位置信息字典
+    :return: 格式化后的位置信息字符串
+    """
+    if not data.get("success"):
+        return f"❌ IP查询失败\n" \
+               f"IP地址: {data.get('ip', '未知')}\n" \
+               f"错误信息: {data.get('error', '未知错误')}"
+    
+    formatter = _LOCATION_FORMATTERS.get(data.get("_src"), _format_location_generic)
+    return formatter(data)
 
 @mcp.tool()
-async def query_ip_location(ip_address: str) -> str:
+async def query_ip_location(ip_address: str, format: str = "text") -> str:
     """
     查询IP地址的归属地信息
     
@@ -196,12 +301,20 @@ async def query_ip_location(ip_address: str) -> str:
     
     参数:
     - ip_address: 要查询的IP地址 (例如: "8.8.8.8" 或 "2001:4860:4860::8888")
+    - format: 输出格式，"text"（默认，易读文本）或 "json"（原始数据，便于程序解析）
     
     返回:
     格式化的IP归属地信息报告
     """
     # 验证IP地址格式
     if not validate_ip_address(ip_address):
+        if format == "json":
+            return orjson.dumps({
+                "success": False,
+                "ip": ip_address,
+                "error": "无效的IP地址格式",
+                "error_code": "INVALID_IP"
+            }).decode()
         return f"❌ 无效的IP地址格式: {ip_address}\n" \
                f"请输入有效的IPv4或IPv6地址\n" \
                f"例如: 8.8.8.8 或 2001:4860:4860::8888"
@@ -215,6 +328,9 @@ async def query_ip_location(ip_address: str) -> str:
         if backup_result.get("success"):
             result = backup_result
     
+    if format == "json":
+        # _src 仅用于选择格式化函数，不对外输出
+        return orjson.dumps({k: v for k, v in result.items() if k != "_src"}).decode()
     return format_location_info(result)
 
 @mcp.tool()
@@ -231,30 +347,39 @@ async def get_my_ip_location() -> str:
     当前IP的归属地信息报告
     """
     try:
-        # 获取当前公网IP
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get("https://api.ipify.org?format=json")
+        data = None
+        try:
+            # ip-api.com 不带IP参数时直接返回调用方公网IP的归属地，无需先单独获取IP
+            response = await get_with_retry(_http.client(), "http://ip-api.com/json/?lang=zh-CN")
             response.raise_for_status()
-            ip_data = response.json()
-            current_ip = ip_data.get("ip")
-            
-            if not current_ip:
-                return "❌ 无法获取当前公网IP地址"
-            
-            # 查询IP归属地
-            result = await query_ip_location_ipapi(current_ip)
+            data = response.json()
+        except (httpx.HTTPError, ValueError):
+            # ip-api.com 被限流（429）、服务端出错、超时或返回内容无法解析时，改用备用API
+            pass
+        
+        current_ip = data.get("query") if data else None
+        if current_ip:
+            result = _build_ipapi_result(data, current_ip)
             
             # 如果主要API失败，尝试备用API
             if not result.get("success"):
                 backup_result = await query_ip_location_ipinfo(current_ip)
                 if backup_result.get("success"):
                     result = backup_result
-            
-            return f"🔍 当前公网IP查询结果\n\n{format_location_info(result)}"
+        else:
+            # ipinfo.io 不带IP参数时同样返回调用方公网IP的归属地
+            result = await query_ip_location_ipinfo()
+            if not result.get("success"):
+                return f"❌ 获取当前IP失败: {result['error']}"
+        
+        return f"🔍 当前公网IP查询结果\n\n{format_location_info(result)}"
             
     except Exception as e:
         return f"❌ 获取当前IP失败: {str(e)}"
 
 if __name__ == "__main__":
+    # 设置 MCP_DRYRUN 时只检查模块及依赖能否正常加载，随后直接退出（供 test_server.py 使用）
+    if os.environ.get("MCP_DRYRUN"):
+        sys.exit(0)
     # 以标准 I/O 方式运行 MCP 服务器
     mcp.run(transport="stdio")
\ No newline at end of file
@@ -1,19 +1,97 @@
 import os
-import json
+import pathlib
+import socket
+import sys
+import threading
+import time
+import orjson
+import asyncio
 import httpx
 from typing import Any
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
- 
-# 初始化 MCP 服务器
-mcp = FastMCP("WeatherServer")
+
+try:
+    from mcp_servers._cache import cache_put
+    from mcp_servers._net import SharedAsyncClient, retry_async
+except ImportError:
+    # 以脚本方式运行（python mcp_servers/weather_server.py）时从同目录导入
+    from _cache import cache_put
+    from _net import SharedAsyncClient, retry_async
  
 # OpenWeather API 配置
 # 加载项目根目录的 .env 文件
-load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+_ENV_PATH = pathlib.Path(__file__).resolve().parent.parent / ".env"
+load_dotenv(_ENV_PATH)
 OPENWEATHER_API_BASE = "https://api.openweathermap.org/data/2.5/weather"
 API_KEY = os.getenv("OPENWEATHER_API_KEY")
 USER_AGENT = "weather-app/1.0"
+
+# 天气缓存时间（秒），天气数据约 10 分钟才有明显变化
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+# 请求失败结果的缓存时间（秒），接口持续出错时避免每次调用都重新经历超时和重试
+WEATHER_NEGATIVE_CACHE_TTL = float(os.getenv("WEATHER_NEGATIVE_CACHE_TTL", "30"))
+
+# 天气缓存最多保留的城市数，城市名由用户任意输入
+WEATHER_CACHE_MAXSIZE = 1024
+
+# 城市名（小写）-> (过期时间, 天气数据)
+_weather_cache: dict[str, tuple[float, dict[str, Any]]] = {}
+
+# 城市名（小写）-> 进行中的请求，同一城市的并发调用共享同一个请求
+_inflight: dict[str, asyncio.Task] = {}
+
+# 每次请求都相同的查询参数
+_BASE_PARAMS = {"units": "metric", "lang": "zh_cn"}
+
+# DNS 解析结果缓存时间（秒）和最多缓存的条目数
+DNS_CACHE_TTL = float(os.getenv("DNS_CACHE_TTL", "300"))
+DNS_CACHE_MAXSIZE = 256
+
+# getaddrinfo 参数 -> (过期时间, 解析结果)；解析在线程池中执行，需要加锁
+_dns_cache: dict[tuple, tuple[float, list]] = {}
+_dns_cache_lock = threading.Lock()
+_system_getaddrinfo = socket.getaddrinfo
+
+def _cached_getaddrinfo(*args: Any, **kwargs: Any) -> list:
+    """
+    带 TTL 缓存的 socket.getaddrinfo，同一主机在有效期内不再重复走系统解析器
+    :param args: 传给 socket.getaddrinfo 的位置参数
+    :param kwargs: 传给 socket.getaddrinfo 的关键字参数
+    :return: 解析结果列表
+    """
+    key = (args, tuple(sorted(kwargs.items())))
+    now = time.monotonic()
+    with _dns_cache_lock:
+        cached = _dns_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    # 解析失败时直接抛出异常，不缓存
+    result = _system_getaddrinfo(*args, **kwargs)
+    with _dns_cache_lock:
+        cache_put(_dns_cache, key, result, DNS_CACHE_TTL, DNS_CACHE_MAXSIZE)
+    return result
+
+def install_dns_cache() -> None:
+    """用带缓存的版本替换 socket.getaddrinfo，仅在作为独立服务器进程运行时调用"""
+    socket.getaddrinfo = _cached_getaddrinfo
+
+# 分阶段的请求超时：连接、写入和等待连接池都应很快完成，只给读取响应留出较多时间
+_TIMEOUT = httpx.Timeout(connect=3.0, read=8.0, write=3.0, pool=3.0)
+
+# 网络错误、429 或 5xx 时的最多尝试次数和退避基础秒数
+WEATHER_RETRIES = 3
+WEATHER_RETRY_BASE_DELAY = 0.2
+
+# 模块级共享的 HTTP 客户端，复用 keep-alive 连接，避免每次请求重新进行 DNS 解析和 TLS 握手
+_http = SharedAsyncClient(
+    timeout=_TIMEOUT,
+    headers={"User-Agent": USER_AGENT},
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+)
+ 
+# 初始化 MCP 服务器
+mcp = FastMCP("WeatherServer", lifespan=_http.lifespan)
  
 """
 异步获取城市天气。
@@ -22,7 +100,7 @@ USER_AGENT = "weather-app/1.0"
 """
 async def fetch_weather(city: str) -> dict[str, Any] | None:
     """
-    从 OpenWeather API 获取天气信息。
+    获取天气信息，同一城市在缓存有效期内直接返回缓存结果，并发的相同请求只发送一次。
     :param city: 城市名称（需使用英文，如 Beijing）
     :return: 天气数据字典；若出错返回包含 error 信息的字典
     """
@@ -30,24 +108,67 @@ async def fetch_weather(city: str) -> dict[str, Any] | None:
     if not API_KEY:
         return {"error": "Missing OPENWEATHER_API_KEY in environment"}
 
-    params = {
-        "q": city,
-        "appid": API_KEY,
-        "units": "metric",
-        "lang": "zh_cn"
-    }
-    headers = {"User-Agent": USER_AGENT}
+    key = city.strip().lower()
+    cached = _weather_cache.get(key)
+    if cached and time.monotonic() < cached[0]:
+        return cached[1]
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(request_and_cache_weather(city, key))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield: 某个调用方被取消时，不影响其他等待同一请求的调用方
+    return await asyncio.shield(task)
+
+async def request_and_cache_weather(city: str, key: str) -> dict[str, Any]:
+    """
+    请求天气信息并写入缓存。
+    :param city: 城市名称（需使用英文，如 Beijing）
+    :param key: 缓存键（小写城市名）
+    :return: 天气数据字典；若出错返回包含 error 信息的字典
+    """
+    data = await request_weather(city)
+    # 请求失败的结果只短暂缓存，过期后重新请求
+    ttl = WEATHER_NEGATIVE_CACHE_TTL if "error" in data else WEATHER_CACHE_TTL
+    cache_put(_weather_cache, key, data, ttl, WEATHER_CACHE_MAXSIZE)
+    return data
+
+async def request_weather(
+    city: str, _url: str = OPENWEATHER_API_BASE, _key: str | None = API_KEY
+) -> dict[str, Any]:
+    """
+    从 OpenWeather API 获取天气信息。
+    :param city: 城市名称（需使用英文，如 Beijing）
+    :param _url: 接口地址，以默认参数绑定为局部变量，调用方无需传入
+    :param _key: API Key，同上
+    :return: 天气数据字典；若出错返回包含 error 信息的字典
+    """
+    params = {**_BASE_PARAMS, "q": city, "appid": _key}
  
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(OPENWEATHER_API_BASE, params=params, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()  # 返回字典类型
-        except httpx.HTTPStatusError as e:
-            return {"error": f"HTTP 错误: {e.response.status_code}"}
-        except Exception as e:
-            return {"error": f"请求失败: {str(e)}"}
+    try:
+        client = _http.client()
+        response = await retry_async(
+            lambda: client.get(_url, params=params),
+            retries=WEATHER_RETRIES,
+            base_delay=WEATHER_RETRY_BASE_DELAY,
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)  # 返回字典类型
+    except httpx.HTTPStatusError as e:
+        return {"error": f"HTTP 错误: {e.response.status_code}"}
+    except Exception as e:
+        return {"error": f"请求失败: {str(e)}"}
  
+# 天气信息的输出模板，在模块加载时构建一次
+_WEATHER_TEMPLATE = (
+    "🌍 {city}, {country}\n"
+    "🌡 温度: {temp}°C\n"
+    "💧 湿度: {humidity}%\n"
+    "🌬 风速: {wind_speed} m/s\n"
+    "🌤 天气: {description}\n"
+)
+
 def format_weather(data: dict[str, Any] | str) -> str:
     """
     将天气数据格式化为易读文本。
@@ -57,7 +178,7 @@ def format_weather(data: dict[str, Any] | str) -> str:
     # 如果传入的是字符串，则先转换为字典
     if isinstance(data, str):
         try:
-            data = json.loads(data)
+            data = orjson.loads(data)
         except Exception as e:
             return f"无法解析天气数据: {e}"
  
@@ -65,22 +186,19 @@ def format_weather(data: dict[str, Any] | str) -> str:
     if "error" in data:
         return f"⚠️ {data['error']}"
  
-    # 提取数据时做容错处理
-    city = data.get("name", "未知")
-    country = data.get("sys", {}).get("country", "未知")
-    temp = data.get("main", {}).get("temp", "N/A")
-    humidity = data.get("main", {}).get("humidity", "N/A")
-    wind_speed = data.get("wind", {}).get("speed", "N/A")
-    # weather 可能为空列表，因此用 [0] 前先提供默认字典
-    weather_list = data.get("weather", [{}])
-    description = weather_list[0].get("description", "未知")
+    # 各子对象只取一次；字段为 null 或 weather 为空列表时回退到空字典
+    main = data.get("main") or {}
+    sys_ = data.get("sys") or {}
+    wind_ = data.get("wind") or {}
+    wx = (data.get("weather") or [{}])[0]
  
-    return (
-        f"🌍 {city}, {country}\n"
-        f"🌡 温度: {temp}°C\n"
-        f"💧 湿度: {humidity}%\n"
-        f"🌬 风速: {wind_speed} m/s\n"
-        f"🌤 天气: {description}\n"
+    return _WEATHER_TEMPLATE.format(
+        city=data.get("name", "未知"),
+        country=sys_.get("country", "未知"),
+        temp=main.get("temp", "N/A"),
+        humidity=main.get("humidity", "N/A"),
+        wind_speed=wind_.get("speed", "N/A"),
+        description=wx.get("description", "未知"),
     )
  
  
@@ -106,5 +224,17 @@ async def query_weather(city: str) -> str:
     return format_weather(data)
  
 if __name__ == "__main__":
+    # 设置 MCP_DRYRUN 时只检查模块及依赖能否正常加载，随后直接退出（供 test_server.py 使用）
+    if os.environ.get("MCP_DRYRUN"):
+        sys.exit(0)
+    # 安装了 uvloop 时用它替换默认事件循环，未安装则保持标准 asyncio
+    try:
+        import uvloop
+    except ImportError:
+        # 标准 asyncio 在线程池中调用 socket.getaddrinfo，缓存解析结果后重复请求可跳过系统解析器；
+        # uvloop 使用自带的解析器，不经过 socket.getaddrinfo，无需安装缓存
+        install_dns_cache()
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     # 以标准 I/O 方式运行 MCP 服务器（仅输出 JSON-RPC 到 STDOUT）
     mcp.run(transport="stdio")
\ No newline at end of file
@@ -20,20 +20,25 @@ except ImportError as e:
     print("请确保已安装所需依赖: pip install -r requirements.txt")
     sys.exit(1)
 
+# 测试输出中使用的分隔线
+SECTION_LINE = "=" * 50
+SUBSECTION_LINE = "-" * 30
+BLOCK_SEPARATOR = "\n" + SECTION_LINE + "\n"
+
 
 async def test_baidu_domain():
     """测试百度域名查询"""
     domain = "www.baidu.com"
     
     print("🌐 域名信息查询服务测试")
-    print("=" * 50)
+    print(SECTION_LINE)
     print(f"测试域名: {domain}")
     print(f"测试时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
     
     # 测试 1: 单个域名查询
     print("📋 测试 1: 单个域名查询")
-    print("-" * 30)
+    print(SUBSECTION_LINE)
     try:
         result1 = await query_domain(domain)
         print(result1)
@@ -41,11 +46,11 @@ async def test_baidu_domain():
     except Exception as e:
         print(f"❌ 单个域名查询测试失败: {e}")
     
-    print("\n" + "=" * 50 + "\n")
+    print(BLOCK_SEPARATOR)
     
     # 测试 2: 批量域名查询
     print("📋 测试 2: 批量域名查询")
-    print("-" * 30)
+    print(SUBSECTION_LINE)
     try:
         batch_domains = "www.baidu.com,www.google.com"
         result2 = await batch_query_domains(batch_domains)
@@ -54,11 +59,11 @@ async def test_baidu_domain():
     except Exception as e:
         print(f"❌ 批量域名查询测试失败: {e}")
     
-    print("\n" + "=" * 50 + "\n")
+    print(BLOCK_SEPARATOR)
     
     # 测试 3: 域名可用性检查
     print("📋 测试 3: 域名可用性检查")
-    print("-" * 30)
+    print(SUBSECTION_LINE)
     try:
         result3 = await check_domain_availability(domain)
         print(result3)
@@ -66,7 +71,7 @@ async def test_baidu_domain():
     except Exception as e:
         print(f"❌ 域名可用性检查测试失败: {e}")
     
-    print("\n" + "=" * 50)
+    print("\n" + SECTION_LINE)
     print("🎉 所有测试完成！")
 
 
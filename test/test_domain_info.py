@@ -7,7 +7,8 @@
 import asyncio
 import sys
 import os
-import json
+import time
+import orjson
 from datetime import datetime
 
 # 添加父目录到 Python 路径，以便导入 MCP 服务器模块
@@ -25,9 +26,20 @@ from mcp_servers.getDomainInfo_server import (
 class DomainInfoTester:
     """域名信息查询测试类"""
     
+    # 格式化结果中必须包含的关键信息
+    FORMAT_INDICATORS = ("域名查询结果", "基本信息", "查询时间")
+    # 可用性检查结果中至少包含其一的关键信息
+    AVAILABILITY_INDICATORS = ("域名可用", "域名不可用")
+    
     def __init__(self):
-        self.test_results = []
         self.start_time = datetime.now()
+        self.total_tests = 0
+        self.passed_tests = 0
+        # 只保留失败测试的名称和信息，用于报告展示
+        self.failures = []
+        # 测试结果逐条写入 JSONL 报告，不在内存中保留完整的查询数据
+        self.report_file = f"test_report_{self.start_time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+        self._report_fp = open(self.report_file, 'wb')
     
     def log_test(self, test_name: str, success: bool, message: str = "", data: any = None):
         """记录测试结果"""
@@ -35,10 +47,17 @@ class DomainInfoTester:
             'test_name': test_name,
             'success': success,
             'message': message,
-            'timestamp': datetime.now().isoformat(),
+            # 只记录整数纳秒时间戳，需要可读时间时由报告读取方自行转换
+            'ts_ns': time.time_ns(),
             'data': data
         }
-        self.test_results.append(result)
+        self.total_tests += 1
+        if success:
+            self.passed_tests += 1
+        else:
+            self.failures.append((test_name, message))
+        # orjson 直接输出 UTF-8 字节并原生支持 datetime，其余无法序列化的值转为字符串
+        self._report_fp.write(orjson.dumps(result, option=orjson.OPT_APPEND_NEWLINE, default=str))
         
         status = "✅ PASS" if success else "❌ FAIL"
         print(f"{status} {test_name}")
@@ -46,6 +65,19 @@ class DomainInfoTester:
             print(f"    {message}")
         print()
     
+    @staticmethod
+    def print_preview(title: str, lines: list, ellipsis: bool = True):
+        """一次性写出结果预览（每行缩进 4 个空格），避免逐行 print"""
+        body = [title, *lines]
+        if ellipsis:
+            body.append("...")
+        sys.stdout.write("    " + "\n    ".join(body) + "\n\n")
+    
+    @staticmethod
+    def missing_indicators(text: str, indicators: tuple) -> list:
+        """返回 text 中缺少的关键信息，保持 indicators 中的顺序"""
+        return [ind for ind in indicators if ind not in text]
+    
     def test_fetch_domain_info(self, domain: str = "www.baidu.com"):
         """测试基础域名信息获取功能"""
         print(f"🔍 测试基础域名信息获取: {domain}")
@@ -102,7 +134,7 @@ class DomainInfoTester:
             formatted_result = format_domain_info(raw_data)
             
             # 检查格式化结果
-            if not formatted_result or len(formatted_result.strip()) == 0:
+            if not formatted_result or formatted_result.isspace():
                 self.log_test(
                     "format_domain_info", 
                     False, 
@@ -111,8 +143,7 @@ class DomainInfoTester:
                 return False
             
             # 检查是否包含关键信息
-            key_indicators = ["域名查询结果", "基本信息", "查询时间"]
-            missing_indicators = [ind for ind in key_indicators if ind not in formatted_result]
+            missing_indicators = self.missing_indicators(formatted_result, self.FORMAT_INDICATORS)
             
             if missing_indicators:
                 self.log_test(
@@ -130,12 +161,8 @@ class DomainInfoTester:
             )
             
             # 打印格式化结果的前几行作为示例
-            lines = formatted_result.split('\n')[:8]
-            print("    格式化结果预览:")
-            for line in lines:
-                print(f"    {line}")
-            print("    ...")
-            print()
+            lines = formatted_result.split('\n', 8)[:8]
+            self.print_preview("格式化结果预览:", lines)
             
             return True
             
@@ -154,7 +181,7 @@ class DomainInfoTester:
         try:
             result = await query_domain(domain)
             
-            if not result or len(result.strip()) == 0:
+            if not result or result.isspace():
                 self.log_test(
                     "query_domain", 
                     False, 
@@ -179,12 +206,8 @@ class DomainInfoTester:
             )
             
             # 打印查询结果的前几行
-            lines = result.split('\n')[:6]
-            print("    查询结果预览:")
-            for line in lines:
-                print(f"    {line}")
-            print("    ...")
-            print()
+            lines = result.split('\n', 6)[:6]
+            self.print_preview("查询结果预览:", lines)
             
             return True
             
@@ -203,7 +226,7 @@ class DomainInfoTester:
         try:
             result = await batch_query_domains(domains)
             
-            if not result or len(result.strip()) == 0:
+            if not result or result.isspace():
                 self.log_test(
                     "batch_query_domains", 
                     False, 
@@ -237,12 +260,8 @@ class DomainInfoTester:
             )
             
             # 打印批量查询结果的前几行
-            lines = result.split('\n')[:10]
-            print("    批量查询结果预览:")
-            for line in lines:
-                print(f"    {line}")
-            print("    ...")
-            print()
+            lines = result.split('\n', 10)[:10]
+            self.print_preview("批量查询结果预览:", lines)
             
             return True
             
@@ -261,7 +280,7 @@ class DomainInfoTester:
         try:
             result = await check_domain_availability(domain)
             
-            if not result or len(result.strip()) == 0:
+            if not result or result.isspace():
                 self.log_test(
                     "check_domain_availability", 
                     False, 
@@ -270,8 +289,7 @@ class DomainInfoTester:
                 return False
             
             # 检查结果是否包含可用性信息
-            availability_indicators = ["域名可用", "域名不可用"]
-            has_availability_info = any(ind in result for ind in availability_indicators)
+            has_availability_info = any(ind in result for ind in self.AVAILABILITY_INDICATORS)
             
             if not has_availability_info:
                 self.log_test(
@@ -293,11 +311,8 @@ class DomainInfoTester:
             )
             
             # 打印可用性检查结果
-            lines = result.split('\n')[:8]
-            print("    可用性检查结果:")
-            for line in lines:
-                print(f"    {line}")
-            print()
+            lines = result.split('\n', 8)[:8]
+            self.print_preview("可用性检查结果:", lines, ellipsis=False)
             
             return True
             
@@ -328,17 +343,21 @@ class DomainInfoTester:
             ("域名可用性检查工具", self.test_check_domain_availability, test_domain),
         ]
         
-        for test_name, test_func, test_param in tests:
-            try:
-                if asyncio.iscoroutinefunction(test_func):
-                    await test_func(test_param)
-                else:
-                    test_func(test_param)
-            except Exception as e:
-                self.log_test(test_name, False, f"测试执行异常: {str(e)}")
-        
-        # 生成测试报告
-        self.generate_test_report()
+        try:
+            for test_name, test_func, test_param in tests:
+                try:
+                    if asyncio.iscoroutinefunction(test_func):
+                        await test_func(test_param)
+                    else:
+                        test_func(test_param)
+                except Exception as e:
+                    self.log_test(test_name, False, f"测试执行异常: {str(e)}")
+            
+            # 生成测试报告
+            self.generate_test_report()
+        finally:
+            # 测试中途被中断时也要关闭报告文件，保留已写入的结果
+            self._report_fp.close()
     
     def generate_test_report(self):
         """生成测试报告"""
@@ -346,22 +365,23 @@ class DomainInfoTester:
         print("📋 测试报告")
         print("=" * 60)
         
-        total_tests = len(self.test_results)
-        passed_tests = sum(1 for result in self.test_results if result['success'])
+        total_tests = self.total_tests
+        passed_tests = self.passed_tests
         failed_tests = total_tests - passed_tests
+        # 没有记录任何测试时成功率按 0 计算，避免除零
+        success_rate = passed_tests / total_tests * 100 if total_tests else 0.0
         
         print(f"总测试数: {total_tests}")
         print(f"通过测试: {passed_tests}")
         print(f"失败测试: {failed_tests}")
-        print(f"成功率: {(passed_tests/total_tests*100):.1f}%")
+        print(f"成功率: {success_rate:.1f}%")
         print()
         
         # 显示失败的测试
         if failed_tests > 0:
             print("❌ 失败的测试:")
-            for result in self.test_results:
-                if not result['success']:
-                    print(f"  - {result['test_name']}: {result['message']}")
+            for test_name, message in self.failures:
+                print(f"  - {test_name}: {message}")
             print()
         
         # 计算测试耗时
@@ -369,21 +389,18 @@ class DomainInfoTester:
         duration = (end_time - self.start_time).total_seconds()
         print(f"测试耗时: {duration:.2f} 秒")
         
-        # 保存详细测试结果到文件
-        report_file = f"test_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'summary': {
-                    'total_tests': total_tests,
-                    'passed_tests': passed_tests,
-                    'failed_tests': failed_tests,
-                    'success_rate': passed_tests/total_tests*100,
-                    'duration_seconds': duration
-                },
-                'test_results': self.test_results
-            }, f, ensure_ascii=False, indent=2)
+        # 在逐条记录之后追加汇总信息
+        self._report_fp.write(orjson.dumps({
+            'summary': {
+                'total_tests': total_tests,
+                'passed_tests': passed_tests,
+                'failed_tests': failed_tests,
+                'success_rate': success_rate,
+                'duration_seconds': duration
+            }
+        }, option=orjson.OPT_APPEND_NEWLINE))
         
-        print(f"详细测试报告已保存到: {report_file}")
+        print(f"详细测试报告已保存到: {self.report_file}")
 
 
 async def main():
@@ -398,5 +415,13 @@ async def main():
 
 
 if __name__ == "__main__":
-    # 运行异步测试
-    asyncio.run(main())
\ No newline at end of file
+    # 运行异步测试；安装了 uvloop 0.18 及以上版本时使用其事件循环，否则回退到标准 asyncio
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+    uvloop_run = getattr(uvloop, "run", None)
+    if uvloop_run is not None:
+        uvloop_run(main())
+    else:
+        asyncio.run(main())
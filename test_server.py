@@ -1,47 +1,48 @@
 #!/usr/bin/env python3
+import os
 import sys
 import subprocess
-import signal
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 多个服务器并发测试时，保证每个服务器的输出作为整体打印，不会互相穿插
+print_lock = threading.Lock()
 
 def test_server(server_path):
-    """测试MCP服务器是否能正常启动"""
+    """测试MCP服务器是否能正常启动（MCP_DRYRUN 模式下加载完模块即退出，无需等待）"""
+    output = [f"正在测试服务器: {server_path}"]
     try:
-        print(f"正在测试服务器: {server_path}")
-        
-        # 启动服务器进程
-        process = subprocess.Popen(
+        # 以 MCP_DRYRUN 模式启动服务器进程，加载成功时以返回码 0 退出
+        result = subprocess.run(
             [sys.executable, server_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
+            capture_output=True,
+            text=True,
+            timeout=5,
+            env={**os.environ, "MCP_DRYRUN": "1"}
         )
         
-        # 等待2秒看是否有错误
-        time.sleep(2)
-        
-        # 检查进程状态
-        poll_result = process.poll()
-        
-        if poll_result is None:
-            # 进程仍在运行，说明启动成功
-            print("✅ 服务器启动成功")
-            process.terminate()
-            process.wait(timeout=5)
+        if result.returncode == 0:
+            output.append("✅ 服务器启动成功")
             return True
         else:
-            # 进程已退出，可能有错误
-            stdout, stderr = process.communicate()
-            print(f"❌ 服务器启动失败")
-            if stderr:
-                print(f"错误输出: {stderr}")
-            if stdout:
-                print(f"标准输出: {stdout}")
+            # 进程异常退出，可能有错误
+            output.append(f"❌ 服务器启动失败")
+            if result.stderr:
+                output.append(f"错误输出: {result.stderr}")
+            if result.stdout:
+                output.append(f"标准输出: {result.stdout}")
             return False
             
+    except subprocess.TimeoutExpired:
+        output.append("❌ 服务器启动超时")
+        return False
     except Exception as e:
-        print(f"❌ 测试过程中出错: {e}")
+        output.append(f"❌ 测试过程中出错: {e}")
         return False
+    finally:
+        with print_lock:
+            print("\n".join(output))
+            print("-" * 50)
 
 if __name__ == "__main__":
     servers = [
@@ -51,10 +52,9 @@ if __name__ == "__main__":
         "mcp_servers/ip_location_server.py"
     ]
     
-    results = {}
-    for server in servers:
-        results[server] = test_server(server)
-        print("-" * 50)
+    # 各服务器的检查互不依赖，并发执行，总耗时取决于最慢的一个
+    with ThreadPoolExecutor(max_workers=len(servers)) as executor:
+        results = dict(zip(servers, executor.map(test_server, servers)))
     
     print("\n📊 测试结果汇总:")
     for server, success in results.items():